@@ -1,19 +1,27 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_file
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, flash, send_file
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import defer
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 import secrets
+import shutil
 import json
+import hashlib
 from datetime import datetime, timedelta
-import subprocess
+import threading
 import tempfile
 import base64
 from PIL import Image
 import io
+import mimetypes
+from urllib.parse import quote
 import requests
 
+import new
+
 # Face animation removed for cleaner, modern design
 FACE_ANIMATION_AVAILABLE = False
 
@@ -23,11 +31,56 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ascii_converter.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Let the reverse proxy stream downloads: X-Sendfile (Apache) or X-Accel-Redirect (nginx)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX')  # e.g. /internal-uploads/
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 db = SQLAlchemy(app)
+
+# CPU-bound conversions run in worker processes, at most CONVERSION_WORKERS at a time
+# per server process (default: one per CPU)
+CONVERSION_WORKERS = int(os.environ.get('CONVERSION_WORKERS', 0)) or os.cpu_count() or 1
+conversion_context = new.get_process_context()
+# The fork server imports the converter once instead of every worker importing it
+conversion_context.set_forkserver_preload(['__main__', 'new'])
+conversion_slots = threading.BoundedSemaphore(CONVERSION_WORKERS)
+CONVERSION_TIMEOUT = 60  # seconds a conversion may run
+CONVERSION_QUEUE_TIMEOUT = 10  # seconds to wait for a free worker slot
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1MB
+
+# Keep-alive HTTP session so repeat GIF downloads reuse CDN connections
+http_session = requests.Session()
+http_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=3))
+
+class ConversionBusy(Exception):
+    """No worker slot freed up within CONVERSION_QUEUE_TIMEOUT"""
+
+def run_conversion_job(*args, **kwargs):
+    """Run new.run_conversion in a worker process of its own
+
+    The timeout counts from when the job starts running, not from when it
+    was queued, and only this job's process is killed when it runs over,
+    so a stuck or crashed conversion never affects other requests.
+    Returns True on success; raises ConversionBusy or TimeoutError.
+    """
+    if not conversion_slots.acquire(timeout=CONVERSION_QUEUE_TIMEOUT):
+        raise ConversionBusy()
+    try:
+        process = conversion_context.Process(target=new.run_conversion_process,
+                                             args=args, kwargs=kwargs, daemon=True)
+        process.start()
+        process.join(CONVERSION_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+            raise TimeoutError('Conversion timed out')
+        return process.exitcode == 0
+    finally:
+        conversion_slots.release()
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -49,11 +102,11 @@ class User(UserMixin, db.Model):
         db.session.commit()
     
     def use_tokens(self, amount):
-        if self.tokens >= amount:
-            self.tokens -= amount
-            db.session.commit()
-            return True
-        return False
+        # Deduct in SQL so concurrent requests can't spend the same tokens twice;
+        # caller commits, so the deduction can share a transaction
+        updated = User.query.filter(User.id == self.id, User.tokens >= amount).update(
+            {User.tokens: User.tokens - amount}, synchronize_session='fetch')
+        return updated > 0
 
 class Conversion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -64,6 +117,9 @@ class Conversion(db.Model):
     settings = db.Column(db.Text)  # JSON string of conversion settings
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     tokens_used = db.Column(db.Integer, default=1)
+    
+    # Dashboard lists a user's latest conversions
+    __table_args__ = (db.Index('ix_conversion_user_created', 'user_id', 'created_at'),)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -81,7 +137,7 @@ def login():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    user_conversions = Conversion.query.filter_by(user_id=current_user.id).order_by(Conversion.created_at.desc()).limit(10).all()
+    user_conversions = Conversion.query.options(defer(Conversion.settings)).filter_by(user_id=current_user.id).order_by(Conversion.created_at.desc()).limit(10).all()
     return render_template('dashboard.html', conversions=user_conversions)
 
 @app.route('/converter')
@@ -102,58 +158,107 @@ def convert_gif():
     if not file.filename.lower().endswith('.gif'):
         return jsonify({'error': 'Only GIF files are supported'}), 400
     
+    # Reject non-GIF content before it reaches the disk
+    header = file.stream.read(6)
+    file.stream.seek(0)
+    if header not in (b'GIF87a', b'GIF89a'):
+        return jsonify({'error': 'Not a valid GIF'}), 400
+    
     # Check if user has enough tokens
     tokens_needed = 1
     
     if current_user.tokens < tokens_needed:
         return jsonify({'error': f'Insufficient tokens. You need at least {tokens_needed} tokens to convert.'}), 400
     
+    # Get conversion settings
+    settings = {
+        'scale': request.form.get('scale', '0.5'),
+        'speed': request.form.get('speed', '1.0'),
+        'inverse': request.form.get('inverse') == 'true',
+        'color': request.form.get('color') == 'true',
+        'size': request.form.get('size', '12'),
+        'output_type': request.form.get('output_type', 'gif')
+    }
+    
     try:
-        # Save uploaded file
+        scale = float(settings['scale'])
+        speed = float(settings['speed'])
+        point_size = int(settings['size'])
+    except ValueError:
+        return jsonify({'error': 'Scale, speed and size must be numbers'}), 400
+    
+    error = new.validate_settings((scale, scale), speed, point_size)
+    if error:
+        return jsonify({'error': error}), 400
+    if settings['output_type'] not in ('gif', 'ascii'):
+        return jsonify({'error': 'Output type must be gif or ascii'}), 400
+    
+    try:
+        # Name the upload by its content hash so identical uploads share a file
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        file_hash = hashlib.blake2b(digest_size=12)
+        for chunk in iter(lambda: file.stream.read(UPLOAD_BUFFER_SIZE), b''):
+            file_hash.update(chunk)
+        file.stream.seek(0)
+        file_key = file_hash.hexdigest()
         
-        # Get conversion settings
-        settings = {
-            'scale': request.form.get('scale', '0.5'),
-            'speed': request.form.get('speed', '1.0'),
-            'inverse': request.form.get('inverse') == 'true',
-            'color': request.form.get('color') == 'true',
-            'size': request.form.get('size', '12'),
-            'output_type': request.form.get('output_type', 'gif')
-        }
+        # Save uploaded file; only a complete copy gets the cached name
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_key}.gif")
+        if not os.path.exists(filepath):
+            partial_upload = os.path.join(app.config['UPLOAD_FOLDER'], f"partial_{secrets.token_hex(4)}_{file_key}.gif")
+            try:
+                with open(partial_upload, 'wb', buffering=UPLOAD_BUFFER_SIZE) as f:
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    shutil.copyfileobj(file.stream, f, length=UPLOAD_BUFFER_SIZE)
+                os.replace(partial_upload, filepath)
+            finally:
+                if os.path.exists(partial_upload):
+                    os.remove(partial_upload)
         
-        # Generate output filename
-        output_filename = f"output_{timestamp}.{'gif' if settings['output_type'] == 'gif' else 'txt'}"
+        # Generate output filename from the upload hash and the parsed settings
+        # that affect the output, so equivalent form values share a cached file
+        output_settings = {'scale': scale, 'speed': speed, 'inverse': settings['inverse'],
+                           'output_type': settings['output_type']}
+        if settings['output_type'] == 'gif':
+            output_settings.update(color=settings['color'], size=point_size)
+        settings_key = hashlib.blake2b(json.dumps(output_settings, sort_keys=True).encode(), digest_size=6).hexdigest()
+        output_filename = f"output_{file_key}_{settings_key}.{'gif' if settings['output_type'] == 'gif' else 'txt'}"
         output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
         
-        # Run conversion using the Python script
-        cmd = [
-            'python', 'new.py', filepath,
-            '--scale', settings['scale'],
-            '--speed', settings['speed'],
-            '--size', settings['size']
-        ]
-        
-        if settings['inverse']:
-            cmd.append('--inverse')
-        if settings['color']:
-            cmd.append('--color')
-        if settings['output_type'] == 'ascii':
-            cmd.append('--ascii')
-        
-        cmd.extend(['--out', output_path])
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        # Skip the conversion if the same GIF was already converted with these settings
+        if not os.path.exists(output_path):
+            # Run conversion in the worker pool; only finished outputs get the cached name
+            partial_path = os.path.join(app.config['UPLOAD_FOLDER'], f"partial_{secrets.token_hex(4)}_{output_filename}")
+            try:
+                try:
+                    success = run_conversion_job(
+                        filepath,
+                        partial_path,
+                        out_scale=(scale, scale),
+                        speed=speed,
+                        inverse=settings['inverse'],
+                        use_color=settings['color'],
+                        point_size=point_size,
+                        ascii_output=settings['output_type'] == 'ascii'
+                    )
+                except ConversionBusy:
+                    return jsonify({'error': 'Server busy, please try again shortly'}), 503
+                except TimeoutError:
+                    return jsonify({'error': 'Conversion timed out'}), 500
+                
+                if not success:
+                    return jsonify({'error': 'Conversion failed'}), 500
+                
+                os.replace(partial_path, output_path)
+            finally:
+                # A timed-out worker is already killed, so nothing writes here any more
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
         
-        if result.returncode != 0:
-            return jsonify({'error': f'Conversion failed: {result.stderr}'}), 500
-        
-        # Deduct tokens and save conversion record
-        current_user.use_tokens(tokens_needed)
+        # Deduct tokens and save conversion record in one transaction
+        if not current_user.use_tokens(tokens_needed):
+            return jsonify({'error': f'Insufficient tokens. You need at least {tokens_needed} tokens to convert.'}), 400
         conversion = Conversion(
             user_id=current_user.id,
             original_filename=filename,
@@ -174,6 +279,7 @@ def convert_gif():
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/search-gifs', methods=['POST'])
@@ -232,19 +338,18 @@ def download_gif():
         if not gif_url:
             return jsonify({'error': 'GIF URL is required'}), 400
         
-        # Download the GIF
-        response = requests.get(gif_url, stream=True)
-        if response.status_code != 200:
-            return jsonify({'error': 'Failed to download GIF'}), 500
-        
-        # Save to uploads folder
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"downloaded_{timestamp}.gif"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Download the GIF; the connection goes back to the pool however this exits
+        with http_session.get(gif_url, stream=True, timeout=(5, 30)) as response:
+            if response.status_code != 200:
+                return jsonify({'error': 'Failed to download GIF'}), 500
+            
+            # Save to uploads folder
+            filename = f"downloaded_{secrets.token_hex(8)}.gif"
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            
+            with open(filepath, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    f.write(chunk)
         
         return jsonify({
             'success': True,
@@ -261,6 +366,13 @@ def download_gif():
 def download_file(filename):
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     if os.path.exists(filepath):
+        accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+        if accel_prefix:
+            response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+            # nginx parses the header as a URI, so escape %, ?, # and spaces
+            response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(filename)
+            response.headers.set('Content-Disposition', 'attachment', filename=filename)
+            return response
         return send_file(filepath, as_attachment=True)
     return jsonify({'error': 'File not found'}), 404
 
@@ -321,7 +433,22 @@ def logout():
 
 # Create database tables
 with app.app_context():
+    @event.listens_for(db.engine, 'connect')
+    def set_sqlite_pragma(dbapi_conn, connection_record):
+        # WAL lets dashboard/token reads proceed while a conversion commits
+        cursor = dbapi_conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-64000')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+    
     db.create_all()
+    
+    # create_all skips indexes on tables that already exist
+    for index in Conversion.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
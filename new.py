@@ -6,142 +6,294 @@ Converts GIF images to ASCII art with various output options
 
 import argparse
 import sys
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageSequence
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import multiprocessing
 import os
 
+# Numba is optional; without it frames are converted with plain NumPy
+try:
+    from numba import njit, prange, set_num_threads
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    njit = lambda *args, **kwargs: (lambda func: func)
+    prange = range
+
 # ASCII character table for brightness mapping
 ASCII_TABLE = " .:-=+*#%@"
 # Alternative tables:
 # " .-*:o+8&#@"
 # " .'`^\",:;Il!i><~+_-?][}{1)(|\\/tfjrxnuvczXYUJCLQ0OZmwqpdbkhao*#MW&8%B@$"
 
+# ASCII_TABLE as uint8 character codes for array lookups
+ASCII_LUT = np.frombuffer(ASCII_TABLE.encode('ascii'), dtype=np.uint8)
+
+def build_char_lut(inverse: bool) -> np.ndarray:
+    """
+    Precompute the character for every R+G+B sum (0-765)
+    Brightness is sum / 3, so index = sum * len(ASCII_TABLE) // 768;
+    sum 0 is a transparent/black pixel and always maps to a blank
+    """
+    sums = np.arange(766)
+    if inverse:
+        sums = 765 - sums
+    char_idx = np.minimum(sums * len(ASCII_TABLE) // 768, len(ASCII_TABLE) - 1)
+    lut = ASCII_LUT[char_idx]
+    lut[0] = ord(' ')
+    return lut
+
+CHAR_LUT = build_char_lut(inverse=False)
+CHAR_LUT_INV = build_char_lut(inverse=True)
+
+# Color mode quantizes each frame to this many colors; palette slot 0 holds the fill color
+PALETTE_COLORS = 255
+
+# Resampling filters for --resample ('auto' picks by scale)
+RESAMPLE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'box': Image.Resampling.BOX,
+    'bilinear': Image.Resampling.BILINEAR,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+
+def resolve_resample(resample: str, out_scale: Tuple[float, float]) -> Image.Resampling:
+    """
+    Map a --resample name to a PIL filter
+    'auto' uses BILINEAR, or BOX averaging when shrinking below a quarter of the area
+    """
+    if resample == 'auto':
+        return Image.Resampling.BILINEAR if out_scale[0] * out_scale[1] >= 0.25 else Image.Resampling.BOX
+    return RESAMPLE_FILTERS[resample]
+
+@njit(parallel=True, cache=True)
+def frame_to_chars(frame_array, char_lut):
+    """
+    Map a uint8[height, width, 3] frame to ASCII character codes in one
+    pass per row without NumPy temporaries
+    """
+    height, width = frame_array.shape[0], frame_array.shape[1]
+    out = np.empty((height, width), dtype=np.uint8)
+    for y in prange(height):
+        for x in range(width):
+            total = np.int32(frame_array[y, x, 0]) + np.int32(frame_array[y, x, 1]) + np.int32(frame_array[y, x, 2])
+            out[y, x] = char_lut[total]
+    return out
+
+def convert_frame(frame_array: np.ndarray, use_color: bool, fill_color: Tuple[int, int, int],
+                  inverse: bool, chars_out: np.ndarray, color_idx_out: np.ndarray,
+                  palette_out: np.ndarray) -> None:
+    """
+    Convert one uint8[height, width, 3] RGB frame into the given
+    character, palette index and uint8[256, 3] palette output arrays
+    """
+    char_lut = CHAR_LUT_INV if inverse else CHAR_LUT
+    
+    if NUMBA_AVAILABLE:
+        chars_out[...] = frame_to_chars(frame_array, char_lut)
+    else:
+        # Brightness (as R+G+B) straight to character through the lookup table
+        np.take(char_lut, frame_array[..., :3].sum(axis=2, dtype=np.uint16), out=chars_out)
+    
+    palette_out[...] = 0
+    palette_out[0] = fill_color
+    
+    if use_color:
+        # Adaptive palette per frame, shifted up one slot to make room for the fill color
+        quantized = Image.fromarray(frame_array[..., :3]).convert('P', palette=Image.Palette.ADAPTIVE,
+                                                                 colors=PALETTE_COLORS)
+        np.add(np.asarray(quantized), 1, out=color_idx_out)
+        color_idx_out[~frame_array.any(axis=2)] = 0
+        quantized_palette = np.array(quantized.getpalette()[:PALETTE_COLORS * 3], dtype=np.uint8)
+        palette_out[1:1 + len(quantized_palette) // 3] = quantized_palette.reshape(-1, 3)
+    else:
+        color_idx_out[...] = 0
+
+def get_process_context():
+    """
+    Start worker processes with forkserver (or spawn where unavailable);
+    forking a threaded parent can copy locks held by other threads
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+def init_worker() -> None:
+    """
+    Set up a pool worker process; the pool already spreads work across
+    the CPUs, so the Numba kernel runs single-threaded in each worker
+    """
+    if NUMBA_AVAILABLE:
+        set_num_threads(1)
+
+def process_frame(frame_array: np.ndarray, use_color: bool, fill_color: Tuple[int, int, int],
+                  inverse: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert one frame in a worker process
+    Returns: (chars, color_idx, palette) for the frame
+    """
+    chars = np.empty(frame_array.shape[:2], dtype=np.uint8)
+    color_idx = np.empty(frame_array.shape[:2], dtype=np.uint8)
+    palette = np.empty((256, 3), dtype=np.uint8)
+    convert_frame(frame_array, use_color, fill_color, inverse, chars, color_idx, palette)
+    return chars, color_idx, palette
+
+def decode_frames(img: Image.Image, new_size: Tuple[int, int], resample: Image.Resampling,
+                  speed: float, delays: List[int]) -> Iterator[np.ndarray]:
+    """
+    Yield each GIF frame as a resized uint8[height, width, 3] array,
+    appending its delay to delays
+    """
+    # Advance through the frames in order so each is composited only once
+    for img_frame in ImageSequence.Iterator(img):
+        # Convert frame to RGB if needed
+        frame = img_frame.convert('RGB') if img_frame.mode != 'RGB' else img_frame
+        
+        # Resize frame according to scale
+        frame = frame.resize(new_size, resample)
+        
+        # Get frame delay (convert from centiseconds to milliseconds)
+        delay = img_frame.info.get('duration', 100)  # Default 100ms if no delay info
+        delays.append(int(delay / speed))
+        
+        yield np.asarray(frame)
+
 def convert_to_ascii(input_file: str, out_scale: Tuple[float, float], 
                      use_color: bool = False, fill_color: Tuple[int, int, int] = (255, 255, 255),
-                     speed: float = 1.0, inverse: bool = False) -> Tuple[List[List[List[Tuple[str, Tuple[int, int, int]]]]], List[int]]:
+                     speed: float = 1.0, inverse: bool = False,
+                     workers: int = 1, resample: str = 'auto') -> Tuple[Optional[np.ndarray], Optional[np.ndarray], Optional[np.ndarray], List[int]]:
     """
     Convert GIF to ASCII representation
-    Returns: (pixels, delays)
+    With workers > 1 frames are converted in a process pool
+    Returns: (chars, color_idx, palettes, delays)
+      chars     - uint8[frames, height, width] ASCII character codes
+      color_idx - uint8[frames, height, width] palette index per character
+      palettes  - uint8[frames, 256, 3] RGB palette per frame
     """
     try:
         # Open the GIF file
         with Image.open(input_file) as img:
-            # Get all frames
-            frames = []
+            # Allocate outputs once; each frame is decoded, converted and dropped
+            n_frames = getattr(img, 'n_frames', 1)
+            new_size = (int(img.width * out_scale[0]), int(img.height * out_scale[1]))
+            chars = np.empty((n_frames, new_size[1], new_size[0]), dtype=np.uint8)
+            color_idx = np.empty((n_frames, new_size[1], new_size[0]), dtype=np.uint8)
+            palettes = np.empty((n_frames, 256, 3), dtype=np.uint8)
             delays = []
             
-            try:
-                while True:
-                    # Convert frame to RGB if needed
-                    if img.mode != 'RGB':
-                        frame = img.convert('RGB')
-                    else:
-                        frame = img.copy()
-                    
-                    # Resize frame according to scale
-                    new_size = (int(img.width * out_scale[0]), int(img.height * out_scale[1]))
-                    frame = frame.resize(new_size, Image.Resampling.LANCZOS)
-                    
-                    frames.append(frame)
-                    
-                    # Get frame delay (convert from centiseconds to milliseconds)
-                    delay = img.info.get('duration', 100)  # Default 100ms if no delay info
-                    delays.append(int(delay / speed))
-                    
-                    img.seek(img.tell() + 1)
-            except EOFError:
-                pass  # End of frames
+            # Decoding stays serial since seeking is stateful
+            frames = decode_frames(img, new_size, resolve_resample(resample, out_scale), speed, delays)
             
-            if not frames:
-                print(f"Failed to read image file {input_file}")
-                return [], []
+            if workers > 1 and n_frames > 1:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context(),
+                                         initializer=init_worker) as executor:
+                    # Keep a bounded window of frames in flight so only a few
+                    # decoded frames are held in memory at once
+                    max_pending = 2 * workers
+                    pending = deque()
+                    done = 0
+                    for frame_array in frames:
+                        pending.append(executor.submit(process_frame, frame_array, use_color,
+                                                       fill_color, inverse))
+                        if len(pending) >= max_pending:
+                            chars[done], color_idx[done], palettes[done] = pending.popleft().result()
+                            done += 1
+                    for future in pending:
+                        chars[done], color_idx[done], palettes[done] = future.result()
+                        done += 1
+            else:
+                for frame_idx, frame_array in enumerate(frames):
+                    convert_frame(frame_array, use_color, fill_color, inverse,
+                                  chars[frame_idx], color_idx[frame_idx], palettes[frame_idx])
             
-            print(f"Loaded {len(frames)} frames")
+            frame_count = len(delays)
+            if not frame_count:
+                print(f"Failed to read image file {input_file}")
+                return None, None, None, []
             
-            # Process each frame
-            out_pixels = []
-            for frame_idx, frame in enumerate(frames):
-                frame_pixels = []
-                frame_array = np.array(frame)
-                
-                for x in range(frame.width):
-                    column = []
-                    for y in range(frame.height):
-                        pixel = frame_array[y, x]
-                        
-                        # Check if pixel is transparent/black
-                        if np.all(pixel == 0):
-                            char = ' '
-                            color = fill_color
-                        else:
-                            # Calculate brightness (average of RGB)
-                            brightness = np.mean(pixel[:3])
-                            
-                            if inverse:
-                                brightness = 255 - brightness
-                            
-                            # Map brightness to ASCII character
-                            char_idx = int((brightness / 256.0) * len(ASCII_TABLE))
-                            char_idx = min(char_idx, len(ASCII_TABLE) - 1)
-                            char = ASCII_TABLE[char_idx]
-                            
-                            if use_color:
-                                color = tuple(pixel[:3])
-                            else:
-                                color = fill_color
-                        
-                        column.append((char, color))
-                    frame_pixels.append(column)
-                
-                out_pixels.append(frame_pixels)
+            print(f"Loaded {frame_count} frames")
             
-            return out_pixels, delays
+            return chars[:frame_count], color_idx[:frame_count], palettes[:frame_count], delays
             
     except Exception as e:
         print(f"Error processing {input_file}: {e}")
-        return [], []
+        return None, None, None, []
 
-def generate_gif(font_file: str, chars: List[List[List[Tuple[str, Tuple[int, int, int]]]]], 
+@lru_cache(maxsize=16)
+def load_font(font_file: str, point_size: int):
+    """
+    Load a TrueType font once per (file, size)
+    """
+    try:
+        return ImageFont.truetype(font_file, point_size)
+    except:
+        # Fallback to default font
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=16)
+def load_glyphs(font_file: str, point_size: int) -> Tuple[int, int, np.ndarray]:
+    """
+    Pre-render every ASCII_TABLE character once as a coverage tile
+    Returns: (char_width, char_height, atlas) where atlas is
+      uint8[256, char_height, char_width] indexed by character code
+    """
+    font = load_font(font_file, point_size)
+    
+    # Calculate character size
+    char_width, char_height = font.getbbox('#')[2:4]
+    
+    atlas = np.zeros((256, char_height, char_width), dtype=np.uint8)
+    for char in set(ASCII_TABLE):
+        tile = Image.new('L', (char_width, char_height), 0)
+        ImageDraw.Draw(tile).text((0, 0), char, fill=255, font=font)
+        atlas[ord(char)] = np.array(tile)
+    
+    # Shared between calls through the cache
+    atlas.setflags(write=False)
+    return char_width, char_height, atlas
+
+def generate_gif(font_file: str, chars: np.ndarray, color_idx: np.ndarray, palettes: np.ndarray,
                 out_file: str, point_size: int, delays: List[int], 
                 back_color: Tuple[int, int, int]) -> bool:
     """
     Generate GIF from ASCII characters
     """
     try:
-        # Load font
-        try:
-            font = ImageFont.truetype(font_file, point_size)
-        except:
-            # Fallback to default font
-            font = ImageFont.load_default()
-        
-        # Calculate character size
-        char_width, char_height = font.getbbox('#')[2:4]
+        # Load font glyphs and character size
+        char_width, char_height, glyph_atlas = load_glyphs(font_file, point_size)
         
-        if not chars or not chars[0] or not chars[0][0]:
+        if chars is None or chars.size == 0:
             print("No valid character data")
             return False
         
         # Get dimensions
-        width = len(chars[0])
-        height = len(chars[0][0])
+        height, width = chars.shape[1:3]
         
         # Create output images
         out_images = []
         
-        for frame_idx, frame_chars in enumerate(chars):
-            # Create image for this frame
-            img = Image.new('RGB', (char_width * width, char_height * height), back_color)
-            draw = ImageDraw.Draw(img)
+        # Blended values peak at 255 * 255 + 127, so uint16 is wide enough
+        back = np.array(back_color[:3], dtype=np.uint16)
+        out_shape = (char_height * height, char_width * width, 3)
+        
+        for frame_idx in range(chars.shape[0]):
+            # Tile glyph coverage into [height, char_height, width, char_width]
+            coverage = glyph_atlas[chars[frame_idx]].transpose(0, 2, 1, 3)[..., None].astype(np.uint16)
+            if color_idx[frame_idx].any():
+                fill = palettes[frame_idx][color_idx[frame_idx]][:, None, :, None, :].astype(np.uint16)
+            else:
+                # Every cell uses the fill color, so broadcast it instead of gathering per cell
+                fill = palettes[frame_idx, 0].astype(np.uint16)
             
-            # Draw each character
-            for x in range(width):
-                for y in range(height):
-                    if x < len(frame_chars) and y < len(frame_chars[x]):
-                        char, color = frame_chars[x][y]
-                        position = (char_width * x, char_height * y)
-                        draw.text(position, char, fill=color, font=font)
+            # Blend fill color over the background by glyph coverage
+            pixels = back * (255 - coverage)
+            pixels += fill * coverage
+            pixels += 127
+            pixels //= 255
+            img = Image.fromarray(pixels.astype(np.uint8).reshape(out_shape), 'RGB')
             
             out_images.append(img)
         
@@ -165,27 +317,28 @@ def generate_gif(font_file: str, chars: List[List[List[Tuple[str, Tuple[int, int
         print(f"Error generating GIF: {e}")
         return False
 
-def generate_ascii_animation(out_file: str, out_pixels: List[List[List[Tuple[str, Tuple[int, int, int]]]]], 
+def frame_to_bytes(frame_chars: np.ndarray) -> bytes:
+    """
+    Pack a uint8[height, width] character frame into one buffer,
+    each row terminated by a newline
+    """
+    if not frame_chars.size:
+        return b''
+    newlines = np.full((frame_chars.shape[0], 1), ord('\n'), dtype=np.uint8)
+    return np.hstack((frame_chars, newlines)).tobytes()
+
+def generate_ascii_animation(out_file: str, chars: np.ndarray, 
                             delays: List[int]) -> bool:
     """
     Generate ASCII animation file
     """
     try:
-        with open(out_file, 'w') as f:
-            for frame_idx, frame in enumerate(out_pixels):
-                f.write(f"Frame {frame_idx + 1} (Delay: {delays[frame_idx]}ms):\n")
-                f.write("-" * 50 + "\n")
-                
-                # Write frame content
-                if frame and frame[0]:
-                    for y in range(len(frame[0])):
-                        for x in range(len(frame)):
-                            if x < len(frame) and y < len(frame[x]):
-                                char, _ = frame[x][y]
-                                f.write(char)
-                        f.write('\n')
+        with open(out_file, 'wb') as f:
+            for frame_idx, frame in enumerate(chars):
+                header = f"Frame {frame_idx + 1} (Delay: {delays[frame_idx]}ms):\n" + "-" * 50 + "\n"
                 
-                f.write('\n')
+                # Write header and frame content in one call
+                f.write(b''.join((header.encode('ascii'), frame_to_bytes(frame), b'\n')))
         
         print(f"ASCII animation saved to {out_file}")
         return True
@@ -194,19 +347,13 @@ def generate_ascii_animation(out_file: str, out_pixels: List[List[List[Tuple[str
         print(f"Error generating ASCII animation: {e}")
         return False
 
-def write_ascii(out_file: str, ascii_data: List[List[Tuple[str, Tuple[int, int, int]]]]) -> bool:
+def write_ascii(out_file: str, frame_chars: np.ndarray) -> bool:
     """
     Write single frame ASCII to file
     """
     try:
-        with open(out_file, 'w') as f:
-            if ascii_data and ascii_data[0]:
-                for y in range(len(ascii_data[0])):
-                    for x in range(len(ascii_data)):
-                        if x < len(ascii_data) and y < len(ascii_data[x]):
-                            char, _ = ascii_data[x][y]
-                            f.write(char)
-                    f.write('\n')
+        with open(out_file, 'wb') as f:
+            f.write(frame_to_bytes(frame_chars))
         
         print(f"ASCII output saved to {out_file}")
         return True
@@ -215,6 +362,23 @@ def write_ascii(out_file: str, ascii_data: List[List[Tuple[str, Tuple[int, int,
         print(f"Error writing ASCII: {e}")
         return False
 
+# Limits shared by the CLI and the web app
+MIN_POINT_SIZE, MAX_POINT_SIZE = 4, 72
+MIN_SPEED, MAX_SPEED = 0.1, 10.0
+
+def validate_settings(out_scale: Tuple[float, float], speed: float, point_size: int) -> Optional[str]:
+    """
+    Check conversion settings
+    Returns: an error message, or None if the settings are valid
+    """
+    if not (0.0 < out_scale[0] <= 1.0 and 0.0 < out_scale[1] <= 1.0):
+        return "Scale must be between 0.0 and 1.0"
+    if not (MIN_SPEED <= speed <= MAX_SPEED):
+        return f"Speed must be between {MIN_SPEED} and {MAX_SPEED}"
+    if not (MIN_POINT_SIZE <= point_size <= MAX_POINT_SIZE):
+        return f"Font size must be between {MIN_POINT_SIZE} and {MAX_POINT_SIZE}"
+    return None
+
 def handle_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -232,7 +396,7 @@ Examples:
     parser.add_argument('--scale', nargs=2, type=float, default=[1.0, 1.0],
                        help='Output scale x y (range 0.0-1.0, default: 1.0 1.0)')
     parser.add_argument('--speed', type=float, default=1.0,
-                       help='Animation speed multiplier (default: 1.0)')
+                       help='Animation speed multiplier (range 0.1-10.0, default: 1.0)')
     parser.add_argument('--inverse', action='store_true',
                        help='Invert brightness')
     parser.add_argument('--font', default='font.ttf',
@@ -240,7 +404,7 @@ Examples:
     parser.add_argument('--out', default='out.gif',
                        help='Output file name (default: out.gif)')
     parser.add_argument('--size', type=int, default=12,
-                       help='Font point size (default: 12)')
+                       help='Font point size (range 4-72, default: 12)')
     parser.add_argument('--ascii', action='store_true',
                        help='Output ASCII text instead of GIF')
     parser.add_argument('--transparent', action='store_true',
@@ -251,67 +415,115 @@ Examples:
                        help='Fill color R G B (default: 255 255 255)')
     parser.add_argument('--color', action='store_true',
                        help='Use original image colors')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processes used to convert frames, 0 for all CPUs (default: 1)')
+    parser.add_argument('--resample', choices=['auto'] + list(RESAMPLE_FILTERS), default='auto',
+                       help='Resize filter; auto uses bilinear, or box when shrinking a lot (default: auto)')
     
     args = parser.parse_args()
     
-    # Validate scale
-    if not (0.0 < args.scale[0] <= 1.0 and 0.0 < args.scale[1] <= 1.0):
-        print("Scale must be between 0.0 and 1.0")
+    # Validate scale, speed and font size
+    error = validate_settings(tuple(args.scale), args.speed, args.size)
+    if error:
+        print(error)
         sys.exit(1)
     
     return args
 
-def main():
-    """Main function"""
-    args = handle_arguments()
-    
-    # Check if input file exists
-    if not os.path.exists(args.input_file):
-        print(f"Input file {args.input_file} not found")
-        sys.exit(1)
-    
-    # Set colors
-    back_color = tuple(args.backcolor)
-    fill_color = tuple(args.fillcolor)
-    
-    if args.transparent:
-        back_color = (0, 0, 0, 0)  # Transparent
+def run_conversion(input_file: str, out_file: str, out_scale: Tuple[float, float] = (1.0, 1.0),
+                   speed: float = 1.0, inverse: bool = False, use_color: bool = False,
+                   font_file: str = 'font.ttf', point_size: int = 12, ascii_output: bool = False,
+                   back_color: Tuple[int, ...] = (0, 0, 0),
+                   fill_color: Tuple[int, int, int] = (255, 255, 255), workers: int = 1,
+                   resample: str = 'auto') -> bool:
+    """
+    Convert a GIF and write the GIF or ASCII text output
+    Returns: True on success
+    """
+    error = validate_settings(out_scale, speed, point_size)
+    if error:
+        print(error)
+        return False
     
     print("Converting...")
     
     # Convert to ASCII
-    ascii_data, delays = convert_to_ascii(
-        args.input_file, 
-        tuple(args.scale), 
-        args.color, 
+    chars, color_idx, palettes, delays = convert_to_ascii(
+        input_file, 
+        out_scale, 
+        use_color, 
         fill_color, 
-        args.speed, 
-        args.inverse
+        speed, 
+        inverse,
+        workers,
+        resample
     )
     
-    if not ascii_data:
+    if chars is None:
         print("Conversion failed")
-        sys.exit(1)
+        return False
     
     print("Generating output...")
     
     # Generate output
-    if args.ascii:
+    if ascii_output:
         # Output ASCII text
-        if len(ascii_data) == 1:
+        if len(chars) == 1:
             # Single frame
-            success = write_ascii(args.out, ascii_data[0])
+            success = write_ascii(out_file, chars[0])
         else:
             # Multiple frames
-            success = generate_ascii_animation(args.out, ascii_data, delays)
+            success = generate_ascii_animation(out_file, chars, delays)
     else:
         # Output GIF
-        success = generate_gif(args.font, ascii_data, args.out, args.size, delays, back_color)
+        success = generate_gif(font_file, chars, color_idx, palettes, out_file, point_size, delays, back_color)
+    
+    if not success:
+        print("Output generation failed")
+    return success
+
+def run_conversion_process(*args, **kwargs) -> None:
+    """
+    Worker process entry point: run_conversion with the result as exit code
+    """
+    init_worker()
+    sys.exit(0 if run_conversion(*args, **kwargs) else 1)
+
+def main():
+    """Main function"""
+    args = handle_arguments()
+    
+    # Check if input file exists
+    if not os.path.exists(args.input_file):
+        print(f"Input file {args.input_file} not found")
+        sys.exit(1)
+    
+    # Set colors
+    back_color = tuple(args.backcolor)
+    fill_color = tuple(args.fillcolor)
+    
+    if args.transparent:
+        back_color = (0, 0, 0, 0)  # Transparent
+    
+    success = run_conversion(
+        args.input_file,
+        args.out,
+        out_scale=tuple(args.scale),
+        speed=args.speed,
+        inverse=args.inverse,
+        use_color=args.color,
+        font_file=args.font,
+        point_size=args.size,
+        ascii_output=args.ascii,
+        back_color=back_color,
+        fill_color=fill_color,
+        workers=args.workers or os.cpu_count() or 1,
+        resample=args.resample
+    )
     
     if success:
         print("Done!")
     else:
-        print("Output generation failed")
         sys.exit(1)
 
 if __name__ == "__main__":